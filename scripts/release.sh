@@ -36,6 +36,26 @@ VERSION_FILE="version.json"
 CHANGELOG_FILE="CHANGELOG.md"
 FLUTTER_VERSION="3.29.1"
 CREDENTIALS_FILE="" # path of credentials.json file
+SHOREBIRD_CACHE_DIR="build/.shorebird_cache"
+CHANGELOG_BUFFER=()
+typeset -A CREDENTIALS # "<flavor>.<field>" -> value, filled by load_credentials
+
+typeset -A PACKAGE_NAMES=(
+    workplacebyls "com.locationsolutions.workplacebyls"
+    workplacebytsphub "com.locationsolutions.workplacebytsphub"
+    tiabytsp "com.locationsolutions.tiabytsp"
+)
+typeset -A IPA_PATHS=(
+    tiabytsp "build/ios/ipa/TIA by TSP.ipa"
+    workplacebyls "build/ios/ipa/Workplace By LS.ipa"
+    workplacebytsphub "build/ios/ipa/Workplace By TSPHub.ipa"
+)
+# Per platform: the store upload function and the credential field it needs
+typeset -A UPLOADERS=(android upload_to_google_play ios upload_to_app_store)
+typeset -A CREDENTIAL_FIELDS=(android google_play ios app_store_key_path)
+
+# fastlane needs a UTF-8 locale; default it once so every child process inherits it
+export LANG="${LANG:-en_US.UTF-8}"
 
 # -----------------------------------------------------------------------------
 # Helpers
@@ -93,77 +113,296 @@ ${BOLD}Commands:${RESET}
   ${CYAN}--help${RESET}                    ${DIM}Show help${RESET}"
 }
 
+# Changelog entries are buffered and written in one append by flush_changelog
 append_changelog() {
     local flavor=$1 platform=$2 build_name=$3 build_number=$4
     local date=$(date +%F)
-    echo "- [$date] $flavor ($platform): $build_name+$build_number" >> "$CHANGELOG_FILE"
+    CHANGELOG_BUFFER+=("- [$date] $flavor ($platform): $build_name+$build_number")
+}
+
+flush_changelog() {
+    (( ${#CHANGELOG_BUFFER[@]} )) || return 0
+    print -rl -- "${CHANGELOG_BUFFER[@]}" >> "$CHANGELOG_FILE"
+    CHANGELOG_BUFFER=()
 }
 
 update_pubspec_yaml() {
     local name=$1 number=$2
-    sed -i '' "s/^[[:space:]]*version:.*$/version: $name+$number/" pubspec.yaml
+    if grep -qx "version: $name+$number" pubspec.yaml; then
+        echo "${INFO} ${DIM}pubspec.yaml already at $name+$number${RESET}"
+        return
+    fi
+    # Only the top-level key; indented `version:` entries belong to dependencies
+    sed -i '' "s/^version:.*$/version: $name+$number/" pubspec.yaml
     echo "${ARROW} Updated ${YELLOW}pubspec.yaml${RESET}"
 }
 
 update_codemagic_yaml() {
     local name=$1 number=$2
     if [[ -f codemagic.yaml ]]; then
-        sed -i '' "s/BUILD_NAME:.*/BUILD_NAME: \"$name\"/" codemagic.yaml
-        sed -i '' "s/BUILD_NUMBER:.*/BUILD_NUMBER: \"$number\"/" codemagic.yaml
+        sed -i '' \
+            -e "s/^\([[:space:]]*\)BUILD_NAME:.*$/\1BUILD_NAME: \"$name\"/" \
+            -e "s/^\([[:space:]]*\)BUILD_NUMBER:.*$/\1BUILD_NUMBER: \"$number\"/" \
+            codemagic.yaml
         echo "${ARROW} Updated ${YELLOW}codemagic.yaml${RESET}"
     fi
 }
 
-get_package_name() {
-    case $1 in
-        workplacebyls) echo "com.locationsolutions.workplacebyls" ;;
-        workplacebytsphub) echo "com.locationsolutions.workplacebytsphub" ;;
-        tiabytsp) echo "com.locationsolutions.tiabytsp" ;;
-        *) echo "com.locationsolutions.workplacebyls" ;;
-    esac
+# Sets build_name and build_number for a flavor/platform from a single jq read
+read_version() {
+    local flavor=$1 platform=$2
+    local output
+    local -a fields
+    if ! output=$(jq -r --arg f "$flavor" --arg p "$platform" \
+        '.[$f].build_name, .[$f][$p].build_number' "$VERSION_FILE"); then
+        echo "${CROSS} Could not read $VERSION_FILE"
+        exit 1
+    fi
+    fields=("${(@f)output}")
+    build_name=${fields[1]}
+    build_number=${fields[2]}
+}
+
+# Sets REPLY to the store artifact a Shorebird release build produces
+artifact_path() {
+    local flavor=$1 platform=$2
+    if [[ "$platform" == "android" ]]; then
+        REPLY="build/app/outputs/bundle/${flavor}Release/app-${flavor}-release.aab"
+    else
+        REPLY=${IPA_PATHS[$flavor]:-}
+    fi
+}
+
+# Prints a hash of everything that feeds a Shorebird release build: the
+# target version, the Flutter version, the checked-out commit and every
+# uncommitted change to tracked or untracked, non-ignored files (lib/,
+# android/, ios/, assets alike). The release bookkeeping files are left out
+# since the version is hashed explicitly. Fails outside a git work tree.
+shorebird_cache_key() {
+    local flavor=$1 platform=$2 build_name=$3 build_number=$4
+    local -a bookkeeping=(":(exclude)$CHANGELOG_FILE" ":(exclude)$VERSION_FILE")
+    local -a untracked
+    local listing
+    git rev-parse --verify -q HEAD > /dev/null || return 1
+    listing=$(git ls-files -z --others --exclude-standard -- . "${bookkeeping[@]}") || return 1
+    untracked=(${(0)listing})
+    {
+        print -r -- "$flavor $platform $build_name+$build_number $FLUTTER_VERSION"
+        git rev-parse HEAD
+        git diff --binary HEAD -- . "${bookkeeping[@]}"
+        if (( ${#untracked} )); then
+            print -rl -- "${untracked[@]}"
+            cat -- "${untracked[@]}"
+        fi
+    } | shasum -a 256 | cut -d' ' -f1
 }
 
-get_ipa_path() {
-    case $1 in
-        tiabytsp) echo "build/ios/ipa/TIA by TSP.ipa" ;;
-        workplacebyls) echo "build/ios/ipa/Workplace By LS.ipa" ;;
-        workplacebytsphub) echo "build/ios/ipa/Workplace By TSPHub.ipa" ;;
-        *) echo "" ;;
-    esac
+# Prints the SHA-256 of a file
+file_hash() {
+    shasum -a 256 < "$1" | cut -d' ' -f1
+}
+
+# A build is fresh when a sentinel for its input hash exists and records the
+# hash of the artifact still on disk. Re-running a release at the same version
+# (e.g. after a failed upload and restoring version.json) then skips straight
+# to upload, while an artifact overwritten by any other build never matches.
+is_build_fresh() {
+    local flavor=$1 platform=$2 key=$3
+    local sentinel="$SHOREBIRD_CACHE_DIR/${flavor}_${platform}_$key"
+    artifact_path "$flavor" "$platform"
+    [[ -n "$REPLY" && -f "$REPLY" && -f "$sentinel" ]] || return 1
+    [[ "$(<"$sentinel")" == "$(file_hash "$REPLY")" ]]
+}
+
+# Drops every sentinel for a flavor/platform; done before each build so a
+# failed build can never leave an older sentinel vouching for its output
+clear_build_cache() {
+    local flavor=$1 platform=$2
+    rm -f "$SHOREBIRD_CACHE_DIR/${flavor}_${platform}_"*(N)
+}
+
+# Records a finished build. The cache only ever saves a rebuild, so failing to
+# write the sentinel is a warning, never a failed release.
+mark_build_fresh() {
+    local flavor=$1 platform=$2 key=$3 hash
+    local sentinel="$SHOREBIRD_CACHE_DIR/${flavor}_${platform}_$key"
+    artifact_path "$flavor" "$platform"
+    [[ -n "$REPLY" && -f "$REPLY" ]] || return 0
+    if hash=$(file_hash "$REPLY") && [[ -n "$hash" ]] \
+        && mkdir -p "$SHOREBIRD_CACHE_DIR" && print -r -- "$hash" > "$sentinel"; then
+        return 0
+    fi
+    rm -f "$sentinel"
+    echo "${WARN} ${YELLOW}Could not record the build in the cache, the next run will rebuild${RESET}"
+}
+
+# Builds and registers a Shorebird release, unless an identical build is
+# already on disk. Arguments after the build number go to `shorebird release`.
+# Returns non-zero on failure; callers may run it as an `if` condition, where
+# errexit does not apply, so failures are checked here.
+shorebird_release() {
+    local flavor=$1 platform=$2 build_name=$3 build_number=$4
+    shift 4
+    local cache_key
+    if ! cache_key=$(shorebird_cache_key "$flavor" "$platform" "$build_name" "$build_number"); then
+        echo "${WARN} ${YELLOW}Could not hash build inputs, building without the cache${RESET}"
+        cache_key=""
+    fi
+    if [[ -n "$cache_key" ]] && is_build_fresh "$flavor" "$platform" "$cache_key"; then
+        echo "${INFO} ${DIM}Shorebird build is up to date, skipping${RESET}"
+        return
+    fi
+
+    clear_build_cache "$flavor" "$platform" || \
+        echo "${WARN} ${YELLOW}Could not clear old cache entries, continuing${RESET}"
+    echo "${ROCKET} ${CYAN}Running Shorebird release...${RESET}"
+    shorebird release "$platform" \
+        --flutter-version="$FLUTTER_VERSION" \
+        --flavor "$flavor" \
+        -t "lib/main_${flavor}.dart" \
+        --build-name="$build_name" \
+        --build-number="$build_number" \
+        "$@" || return 1
+    [[ -z "$cache_key" ]] || mark_build_fresh "$flavor" "$platform" "$cache_key"
+}
+
+# Runs a command and streams its output line by line, prefixed with a tag,
+# so the output of concurrent jobs stays attributable
+run_tagged() {
+    local tag=$1; shift
+    local prefix="${(g::)GRAY}[$tag]${(g::)RESET} " line
+    "$@" 2>&1 | while IFS= read -r line || [[ -n "$line" ]]; do
+        print -r -- "$prefix$line"
+    done
+}
+
+# Parses the credentials file once for all flavors. Call it before starting
+# background uploads so they inherit the parsed values.
+load_credentials() {
+    (( ${#CREDENTIALS} )) && return 0
+    # Let jq's own open/parse error stand in for a separate existence check
+    local entries line
+    if [[ -z "$CREDENTIALS_FILE" ]] || ! entries=$(jq -r \
+        'to_entries[] | .key as $f | .value | to_entries[] | "\($f).\(.key)\t\(.value)"' \
+        "$CREDENTIALS_FILE"); then
+        echo "${CROSS} Could not read credentials file: ${CREDENTIALS_FILE:-<unset>}"
+        exit 1
+    fi
+    for line in "${(@f)entries}"; do
+        if [[ -n "$line" ]]; then
+            CREDENTIALS[${line%%$'\t'*}]=${line#*$'\t'}
+        fi
+    done
+}
+
+# Sets REPLY to a flavor's credential field
+get_credential() {
+    local flavor=$1 field=$2
+    load_credentials
+    if (( ! ${+CREDENTIALS[$flavor.$field]} )); then
+        echo "${CROSS} Missing $field in credentials for $flavor"
+        return 1
+    fi
+    REPLY=${CREDENTIALS[$flavor.$field]}
+}
+
+# Fails fast, before anything is bumped or built, when a tool, version entry
+# or credential needed to release the given flavors/platforms is missing.
+# Takes space-separated flavor and platform lists.
+preflight_release() {
+    local flavors=$1 platforms=$2 tool missing flavor platform
+
+    for tool in shorebird fastlane; do
+        if ! command -v $tool &> /dev/null; then
+            echo "${CROSS} ${RED}$tool not found on PATH${RESET}"
+            exit 1
+        fi
+    done
+
+    missing=$(jq -r --arg flavors "$flavors" --arg platforms "$platforms" '
+        . as $v
+        | ($flavors | split(" "))[] as $f
+        | (if $v[$f].build_name == null then "\($f) build_name" else empty end),
+          (($platforms | split(" "))[] as $p
+            | if $v[$f][$p].build_number == null then "\($f) \($p) build_number" else empty end)
+        ' "$VERSION_FILE")
+    if [[ -n "$missing" ]]; then
+        echo "${CROSS} Missing version info in $VERSION_FILE:"
+        print -rl -- "${(@f)missing}"
+        exit 1
+    fi
+
+    load_credentials
+    for flavor in ${=flavors}; do
+        for platform in ${=platforms}; do
+            get_credential "$flavor" "${CREDENTIAL_FIELDS[$platform]}" || exit 1
+        done
+    done
 }
 
 upload_to_google_play() {
     local flavor=$1
-    local aab="build/app/outputs/bundle/${flavor}Release/app-${flavor}-release.aab"
-    [[ ! -f $aab ]] && echo "${CROSS} AAB not found: $aab" && return
-    local creds=$(jq -r ".$flavor.google_play" "$CREDENTIALS_FILE")
-    local pkg=$(get_package_name $flavor)
+    artifact_path "$flavor" android
+    local aab=$REPLY
+    if [[ ! -f $aab ]]; then
+        echo "${CROSS} AAB not found: $aab"
+        return 1
+    fi
+    get_credential "$flavor" google_play || return 1
+    local creds=$REPLY
+    local pkg=${PACKAGE_NAMES[$flavor]:-${PACKAGE_NAMES[workplacebyls]}}
     echo "${UPLOAD} Uploading to ${BOLD}Google Play${RESET}..."
-    fastlane supply --aab "$aab" --package_name "$pkg" --track production --json_key "$creds" \
-        --skip_upload_metadata --skip_upload_images --skip_upload_screenshots
+    SUPPLY_SKIP_UPLOAD_METADATA=true \
+    SUPPLY_SKIP_UPLOAD_IMAGES=true \
+    SUPPLY_SKIP_UPLOAD_SCREENSHOTS=true \
+        fastlane supply --aab "$aab" --package_name "$pkg" --track production --json_key "$creds"
 }
 
 upload_to_app_store() {
     local flavor=$1
-    local ipa=$(get_ipa_path $flavor)
-    [[ ! -f $ipa ]] && echo "${CROSS} IPA not found: $ipa" && return
-    local key=$(jq -r ".$flavor.app_store_key_path" "$CREDENTIALS_FILE")
+    artifact_path "$flavor" ios
+    local ipa=$REPLY
+    if [[ ! -f $ipa ]]; then
+        echo "${CROSS} IPA not found: $ipa"
+        return 1
+    fi
+    get_credential "$flavor" app_store_key_path || return 1
+    local key=$REPLY
     echo "${UPLOAD} Uploading to ${BOLD}App Store Connect${RESET}..."
     fastlane deliver --ipa "$ipa" --skip_metadata --skip_screenshots \
         --submit_for_review --automatic_release --api_key_path "$key"
 }
 
-handle_bump() {
+# Applies a jq filter to version.json. The result goes to a temp file next to
+# it and is renamed over the original, so an interrupted run never leaves a
+# truncated or half-written version file behind.
+write_version_file() {
+    local tmp
+    tmp=$(mktemp "${VERSION_FILE}.XXXXXX")
+    if ! jq "$@" "$VERSION_FILE" > "$tmp"; then
+        rm -f "$tmp"
+        echo "${CROSS} Failed to update $VERSION_FILE"
+        exit 1
+    fi
+    mv "$tmp" "$VERSION_FILE"
+}
+
+# Increments the build number in version.json; sets build_name and new_build
+bump_build_number() {
     local flavor=$1 platform=$2
-    build_name=$(jq -r ".$flavor.build_name" "$VERSION_FILE")
-    build_number=$(jq -r ".$flavor.$platform.build_number" "$VERSION_FILE")
+    read_version "$flavor" "$platform"
 
     [[ "$build_name" == "null" || "$build_number" == "null" ]] && \
         echo "${CROSS} Missing version info for $flavor ($platform)" && exit 1
 
     new_build=$((build_number + 1))
-    tmp=$(mktemp)
-    jq ".$flavor.$platform.build_number = $new_build" "$VERSION_FILE" > "$tmp" && mv "$tmp" "$VERSION_FILE"
+    write_version_file --arg f "$flavor" --arg p "$platform" --argjson build "$new_build" \
+        '.[$f][$p].build_number = $build'
+}
+
+handle_bump() {
+    local flavor=$1 platform=$2
+    bump_build_number "$flavor" "$platform"
 
     update_pubspec_yaml "$build_name" "$new_build"
     update_codemagic_yaml "$build_name" "$new_build"
@@ -175,21 +414,26 @@ handle_bump() {
 handle_bump_all() {
     for flavor in "${SUPPORTED_FLAVORS[@]}"; do
         for platform in "${SUPPORTED_PLATFORMS[@]}"; do
-            handle_bump "$flavor" "$platform"
+            bump_build_number "$flavor" "$platform"
+            append_changelog "$flavor" "$platform" "$build_name" "$new_build"
+            echo "${CHECK} Bumped ${BOLD}$flavor${RESET} (${DIM}$platform${RESET}) → ${GREEN}$build_name+$new_build${RESET}"
         done
     done
+
+    # pubspec.yaml and codemagic.yaml hold a single version, so write them
+    # once with the last bump instead of after every flavor/platform
+    update_pubspec_yaml "$build_name" "$new_build"
+    update_codemagic_yaml "$build_name" "$new_build"
     echo "${BOX} ${GREEN}All versions bumped and saved${RESET}"
 }
 
 handle_release() {
     local flavor=$1 platform=$2
+    preflight_release "$flavor" "$platform"
     echo ""
     echo "${MAGENTA}➤ Releasing $flavor ($platform)...${RESET}"
 
-    build_name=$(jq -r ".$flavor.build_name" "$VERSION_FILE")
-    build_number=$(jq -r ".$flavor.$platform.build_number" "$VERSION_FILE")
-    [[ "$build_name" == "null" || "$build_number" == "null" ]] && \
-        echo "${CROSS} Missing version info for $flavor ($platform)" && return
+    read_version "$flavor" "$platform"
 
     # Bump patch version and build number
     IFS='.' read -r major minor patch <<< "$build_name"
@@ -198,38 +442,30 @@ handle_release() {
     new_build=$((build_number + 1))
 
     # Update version.json early
-    tmp=$(mktemp)
-    jq ".$flavor.build_name = \"$new_build_name\" | .$flavor.$platform.build_number = $new_build" \
-        "$VERSION_FILE" > "$tmp" && mv "$tmp" "$VERSION_FILE"
+    write_version_file --arg f "$flavor" --arg p "$platform" --arg name "$new_build_name" --argjson build "$new_build" \
+        '.[$f].build_name = $name | .[$f][$p].build_number = $build'
 
     update_pubspec_yaml "$new_build_name" "$new_build"
     update_codemagic_yaml "$new_build_name" "$new_build"
     append_changelog "$flavor" "$platform" "$new_build_name" "$new_build"
 
-    echo "${ROCKET} ${CYAN}Running Shorebird release...${RESET}"
-    target="lib/main_${flavor}.dart"
-    shorebird release "$platform" \
-        --flutter-version="$FLUTTER_VERSION" \
-        --flavor "$flavor" \
-        -t "$target" \
-        --build-name="$new_build_name" \
-        --build-number="$new_build"
+    shorebird_release "$flavor" "$platform" "$new_build_name" "$new_build"
 
-    [[ "$platform" == "android" ]] && upload_to_google_play "$flavor"
-    [[ "$platform" == "ios" ]] && upload_to_app_store "$flavor"
+    ${UPLOADERS[$platform]} "$flavor"
 
     echo "${CHECK} ${GREEN}Done: $flavor ($platform) → $new_build_name+$new_build${RESET}"
 }
 
 handle_release_all() {
+    preflight_release "${(j: :)SUPPORTED_FLAVORS}" "${(j: :)SUPPORTED_PLATFORMS}"
+
     # Get initial version from first flavor/platform to use as base
     local flavor="${SUPPORTED_FLAVORS[1]}"
     local platform="${SUPPORTED_PLATFORMS[1]}"
     
 
     # echo "base_flavor: $base_flavor (base_platform: $base_platform)"
-    build_name=$(jq -r ".$flavor.build_name" "$VERSION_FILE")
-    build_number=$(jq -r ".$flavor.$platform.build_number" "$VERSION_FILE")
+    read_version "$flavor" "$platform"
 
     # Calculate new version numbers once
     IFS='.' read -r major minor patch <<< "$build_name"
@@ -239,45 +475,66 @@ handle_release_all() {
 
     echo "${INFO} ${CYAN}Using version $new_build_name+$new_build for all flavors${RESET}"
 
-    # Update version.json for all flavors at once
-    local tmp=$(mktemp)
-    # Read the content of the file first
-    local json_content=$(cat "$VERSION_FILE")
-    for flavor in "${SUPPORTED_FLAVORS[@]}"; do
-        json_content=$(echo "$json_content" | jq ".$flavor.build_name = \"$new_build_name\"")
-        for platform in "${SUPPORTED_PLATFORMS[@]}"; do
-            json_content=$(echo "$json_content" | jq ".$flavor.$platform.build_number = $new_build")
-        done
-    done
-    echo "$json_content" > "$tmp" && mv "$tmp" "$VERSION_FILE"
+    # Update version.json for all flavors at once, in a single jq pass
+    write_version_file --arg name "$new_build_name" --argjson build "$new_build" \
+        --arg flavors "${(j: :)SUPPORTED_FLAVORS}" --arg platforms "${(j: :)SUPPORTED_PLATFORMS}" '
+        reduce ($flavors | split(" "))[] as $f (.;
+            .[$f].build_name = $name
+            | reduce ($platforms | split(" "))[] as $p (.; .[$f][$p].build_number = $build))
+        '
 
     # Update pubspec.yaml and codemagic.yaml once
     update_pubspec_yaml "$new_build_name" "$new_build"
     update_codemagic_yaml "$new_build_name" "$new_build"
 
-    # Perform releases with the same version
+    # Perform releases with the same version. Shorebird builds share the
+    # Flutter project tree, so they run one at a time; the store uploads are
+    # network-bound and run in the background while the next build proceeds.
+    # A failed build stops further builds, but the uploads already running are
+    # still waited for and recorded before the command exits.
+    local -a upload_pids upload_jobs
+    local build_failed=""
     for flavor in "${SUPPORTED_FLAVORS[@]}"; do
         for platform in "${SUPPORTED_PLATFORMS[@]}"; do
             echo ""
             echo "${MAGENTA}➤ Releasing $flavor ($platform)...${RESET}"
 
-            echo "${ROCKET} ${CYAN}Running Shorebird release...${RESET}"
-            target="lib/main_${flavor}.dart"
-            shorebird release "$platform" \
-                --flutter-version="$FLUTTER_VERSION" \
-                --flavor "$flavor" \
-                -t "$target" \
-                --build-name="$new_build_name" \
-                --build-number="$new_build"
+            # Uploads stream tagged output alongside this build, so a confirmation
+            # prompt would be buried and stall every remaining build
+            if ! shorebird_release "$flavor" "$platform" "$new_build_name" "$new_build" --no-confirm; then
+                build_failed="$flavor ($platform)"
+                break 2
+            fi
 
-            [[ "$platform" == "android" ]] && upload_to_google_play "$flavor"
-            [[ "$platform" == "ios" ]] && upload_to_app_store "$flavor"
+            run_tagged "$flavor/$platform" ${UPLOADERS[$platform]} "$flavor" &
+            upload_pids+=($!)
+            upload_jobs+=("$flavor:$platform")
+        done
+    done
 
+    echo ""
+    echo "${INFO} ${CYAN}Waiting for ${#upload_pids[@]} uploads to finish...${RESET}"
+    local failed=0 i job
+    for (( i = 1; i <= ${#upload_pids[@]}; i++ )); do
+        job="${upload_jobs[$i]}"
+        flavor="${job%%:*}"
+        platform="${job##*:}"
+        if wait "${upload_pids[$i]}"; then
             append_changelog "$flavor" "$platform" "$new_build_name" "$new_build"
             echo "${CHECK} ${GREEN}Done: $flavor ($platform) → $new_build_name+$new_build${RESET}"
-        done
+        else
+            echo "${CROSS} ${RED}Upload failed: $flavor ($platform)${RESET}"
+            failed=$((failed + 1))
+        fi
     done
-    
+
+    if [[ -n "$build_failed" ]]; then
+        echo "${CROSS} ${RED}Shorebird release failed for $build_failed; remaining releases were skipped${RESET}"
+    fi
+    if (( failed > 0 )); then
+        echo "${CROSS} ${RED}$failed of ${#upload_pids[@]} uploads failed for version $new_build_name+$new_build${RESET}"
+    fi
+    [[ -z "$build_failed" ]] && (( failed == 0 )) || exit 1
     echo "${CHECK} ${GREEN}All releases completed with version $new_build_name+$new_build${RESET}"
 }
 
@@ -288,6 +545,22 @@ COMMAND=${1:-}
 FLAVOR=${2:-}
 PLATFORM=${3:-}
 
+case "$COMMAND" in
+    bump|bump-all|release|release-all) ;;
+    --help)
+        print_help
+        exit 0
+        ;;
+    *)
+        echo "${CROSS} Unknown command: $COMMAND"
+        print_help
+        exit 1
+        ;;
+esac
+
+# Write buffered changelog entries however the command ends
+trap flush_changelog EXIT
+
 # Check for required tools
 check_jq # Always needed for version manipulation
 
@@ -312,11 +585,4 @@ case "$COMMAND" in
     release-all)
         handle_release_all
         ;;
-    --help)
-        print_help
-        ;;
-    *)
-        echo "${CROSS} Unknown command: $COMMAND"
-        print_help
-        ;;
 esac